@@ -10,23 +10,45 @@ Features:
 - Cleanup rooms if host disconnected too long
 - Rate limits + max players per room
 - State guards
+- Optional room broadcast fan-out across workers via Postgres LISTEN/NOTIFY
 
 Env:
 - SECRET_KEY (recommended)
 - DATABASE_URL (Render Postgres URL)
 - PORT (Render provides)
+- RELAY_BROADCASTS=1 (only for multi-worker deployments: relay room broadcasts via Postgres NOTIFY)
 """
 
+# Must run before anything else imports socket/threading/psycopg2:
+# green sockets for eventlet, and a libpq wait callback so queries yield to other greenlets.
+import eventlet
+
+eventlet.monkey_patch()
+
+from psycogreen.eventlet import patch_psycopg
+
+patch_psycopg()
+
 import os
+import re
+import json
 import time
 import uuid
+import heapq
 import random
 import string
-from datetime import datetime, timezone
-from typing import Any, Dict, Optional, Tuple
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple, Union
 
 import psycopg2
+import psycopg2.extensions
 import psycopg2.extras
+import psycopg2.pool
+from eventlet.hubs import trampoline
+from eventlet.semaphore import Semaphore
 from flask import Flask, request, send_from_directory
 from flask_socketio import SocketIO, emit, join_room
 
@@ -47,8 +69,31 @@ ANSWER_RATE_WINDOW = 3
 CREATE_ROOM_LIMIT = 3
 CREATE_ROOM_WINDOW = 60
 
-WATCHDOG_INTERVAL_SECONDS = 2
+# buckets idle this long are full again and can be dropped
+RATE_LIMIT_IDLE_SECONDS = max(JOIN_RATE_WINDOW, ANSWER_RATE_WINDOW, CREATE_ROOM_WINDOW)
+
+# the watchdog sleeps until the next known deadline; this only bounds how late
+# it notices rooms it was not told about (started by another worker)
+WATCHDOG_FALLBACK_SECONDS = 60
+# retry delay for rooms the watchdog could not finalize yet (row locked, DB error)
+WATCHDOG_RETRY_SECONDS = 1
+# finalize this long after question_ends_at, so answers accepted just before the deadline
+# (still waiting for a pool slot / their INSERT) are committed before scoring
+QUESTION_FINALIZE_GRACE_SECONDS = 1
 CLEANUP_INTERVAL_SECONDS = 30
+ACTIVITY_FLUSH_INTERVAL_SECONDS = 1
+
+ROOM_CACHE_TTL_SECONDS = 0.2
+
+# broadcasts to socket rooms are emitted locally; with RELAY_BROADCASTS they are also relayed
+# to other workers via Postgres NOTIFY (off by default: a single process needs no relay)
+RELAY_BROADCASTS = os.environ.get("RELAY_BROADCASTS") == "1"
+QUIZ_EVENTS_CHANNEL = "quiz_events"
+NOTIFY_PAYLOAD_MAX_BYTES = 7999  # Postgres limit is 8000 bytes
+LISTENER_RECONNECT_SECONDS = 5
+
+DB_POOL_MIN_CONNECTIONS = 2
+DB_POOL_MAX_CONNECTIONS = 20
 
 # ---------------------------
 # Demo questions (replace later with DB)
@@ -69,6 +114,22 @@ QUESTIONS = [
     },
 ]
 
+# frozen at import:
+# - _bonus_scale turns seconds left into bonus points with one multiply
+# - _public is the client-visible part, shared by every question_started/reconnect payload
+QUESTIONS = tuple(
+    {
+        **q,
+        "_bonus_scale": 500.0 / max(1, int(q["duration"])),
+        "_public": {"text": q["text"], "options": tuple(q["options"])},
+    }
+    for q in QUESTIONS
+)
+
+# scoring inputs as SQL arrays, indexed by current_question_index + 1 (Postgres arrays are 1-based)
+QUESTION_CORRECT_INDEXES = [int(q["correct_index"]) for q in QUESTIONS]
+QUESTION_BONUS_SCALES = [q["_bonus_scale"] for q in QUESTIONS]
+
 # ---------------------------
 # App + SocketIO
 # ---------------------------
@@ -86,12 +147,32 @@ socketio = SocketIO(
 # In-memory (ephemeral) indices
 # ---------------------------
 
+@dataclass(slots=True)
+class SocketMeta:
+    pin: str  # "123456"
+    role: str  # "host" | "player"
+    token: str  # "<uuid str>"
+
 # socket_index maps a socket sid to role+identity to handle disconnect quickly
-# socket_index[sid] = {"pin": "123456", "role": "host|player", "token": "<uuid str>"}
-socket_index: Dict[str, Dict[str, str]] = {}
+socket_index: Dict[str, SocketMeta] = {}
 
-# rate limit buckets: key -> list[timestamps]
-rate_limits: Dict[str, list] = {}
+# short-lived cache of rooms rows: pin -> (monotonic fetch time, row)
+# single-threaded under eventlet, so plain dict ops need no lock
+_room_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+# question deadlines for the watchdog: heap of (ends_at epoch seconds, pin)
+# entries can be stale (room finished/closed early); finalizing is guarded in SQL anyway
+_due_heap: list[Tuple[float, str]] = []
+_due_wakeup = threading.Event()
+
+# room ids with activity not yet written to rooms.last_activity_at (flushed in batches)
+_dirty_activity: set[int] = set()
+
+# identifies this process in NOTIFY payloads so the listener can skip its own broadcasts
+WORKER_ID = uuid.uuid4().hex
+
+# token buckets: key -> [tokens, last_refill (monotonic)]
+rate_limits: Dict[str, list[float]] = {}
 
 # ---------------------------
 # DB helpers
@@ -103,31 +184,112 @@ def _db_url() -> str:
         raise RuntimeError("DATABASE_URL env var is required")
     return url
 
-def db_conn():
-    # Render Postgres requires sslmode=require in most cases //disable
-    return psycopg2.connect(_db_url(), sslmode="require")
+class PreparingConnection(psycopg2.extensions.connection):
+    """
+    Connection that remembers which named statements it has PREPAREd.
+    Prepared statements live as long as the server session, i.e. as long as the pooled connection.
+    """
 
-def db_one(sql: str, params: Tuple[Any, ...] = ()) -> Optional[Dict[str, Any]]:
-    with db_conn() as conn, conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared: set[str] = set()
+
+# Render Postgres requires sslmode=require in most cases //disable
+# One pool per process: connect + TLS handshake is paid once per pooled connection, not per query.
+POOL = psycopg2.pool.ThreadedConnectionPool(
+    DB_POOL_MIN_CONNECTIONS,
+    DB_POOL_MAX_CONNECTIONS,
+    _db_url(),
+    sslmode="require",
+    connection_factory=PreparingConnection,
+)
+
+# ThreadedConnectionPool raises PoolError when exhausted; make greenlets wait for a free slot instead
+_pool_slots = Semaphore(DB_POOL_MAX_CONNECTIONS)
+
+# positional (%s) or named (%(name)s) query parameters
+QueryParams = Union[Tuple[Any, ...], Dict[str, Any]]
+
+@contextmanager
+def get_conn(autocommit: bool = False):
+    """
+    Borrow a pooled connection for one transaction.
+    Commits on success, rolls back on error, and always returns the connection to the pool
+    (broken connections are discarded instead of reused).
+    Waits for a free connection when all DB_POOL_MAX_CONNECTIONS are in use.
+    autocommit=True: no transaction at all, each statement commits on its own (no BEGIN/COMMIT
+    on the wire); use it for single-statement reads.
+    """
+    _pool_slots.acquire()
+    try:
+        conn = POOL.getconn()
+        try:
+            conn.autocommit = autocommit
+            if autocommit:
+                # psycopg2 >= 2.9 opens a transaction in `with conn:` even in autocommit mode
+                yield conn
+            else:
+                with conn:
+                    yield conn
+        finally:
+            POOL.putconn(conn, close=bool(conn.closed))
+    finally:
+        _pool_slots.release()
+
+def _execute(cur, sql: str, params: QueryParams, prepared: Optional[str]) -> None:
+    """
+    prepared=None: plain execute (sql uses %s placeholders).
+    prepared="name": sql uses $1..$n placeholders and params must be a tuple; it is PREPAREd
+    once per connection and then run as EXECUTE name(...), skipping server-side parse/plan on hot queries.
+    """
+    if prepared is None:
         cur.execute(sql, params)
+        return
+
+    conn = cur.connection
+    if prepared not in conn.prepared:
+        cur.execute(f"PREPARE {prepared} AS {sql}")
+        conn.prepared.add(prepared)
+
+    if params:
+        cur.execute(f"EXECUTE {prepared}({', '.join(['%s'] * len(params))})", params)
+    else:
+        cur.execute(f"EXECUTE {prepared}")
+
+def db_one(sql: str, params: QueryParams = (), prepared: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    with get_conn(autocommit=True) as conn, conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        _execute(cur, sql, params, prepared)
         row = cur.fetchone()
         return dict(row) if row else None
 
-def db_all(sql: str, params: Tuple[Any, ...] = ()) -> list[Dict[str, Any]]:
-    with db_conn() as conn, conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-        cur.execute(sql, params)
+def db_all(sql: str, params: QueryParams = (), prepared: Optional[str] = None) -> list[Dict[str, Any]]:
+    with get_conn(autocommit=True) as conn, conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        _execute(cur, sql, params, prepared)
         rows = cur.fetchall()
         return [dict(r) for r in rows]
 
-def db_exec(sql: str, params: Tuple[Any, ...] = ()) -> None:
-    with db_conn() as conn, conn.cursor() as cur:
+def db_exec(sql: str, params: QueryParams = (), prepared: Optional[str] = None) -> None:
+    with get_conn() as conn, conn.cursor() as cur:
+        _execute(cur, sql, params, prepared)
+
+def db_exec_returning(sql: str, params: QueryParams = ()) -> list[Dict[str, Any]]:
+    # write (UPDATE/INSERT ... RETURNING) in its own transaction; returns the RETURNING rows
+    with get_conn() as conn, conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
         cur.execute(sql, params)
-        conn.commit()
+        return [dict(r) for r in cur.fetchall()]
 
 def utc_now() -> datetime:
     return datetime.now(timezone.utc)
 
+# last object created by ensure_tables(); if it exists, the whole schema does.
+# keep this pointing at the newest DDL statement so existing databases pick up additions.
+SCHEMA_SENTINEL = "public.idx_rooms_host_disc"
+
 def ensure_tables():
+    # warm database: one cheap lookup instead of a multi-statement DDL transaction
+    if db_one("SELECT to_regclass(%s) AS t", (SCHEMA_SENTINEL,))["t"]:
+        return
+
     ddl = """
     CREATE TABLE IF NOT EXISTS rooms (
       id BIGSERIAL PRIMARY KEY,
@@ -173,28 +335,60 @@ def ensure_tables():
     CREATE INDEX IF NOT EXISTS idx_rooms_state ON rooms(state);
     CREATE INDEX IF NOT EXISTS idx_players_room ON players(room_id);
     CREATE INDEX IF NOT EXISTS idx_answers_room_q ON answers(room_id, question_index);
+
+    -- partial indexes: only the few rows the watchdog / cleanup scans can match
+    CREATE INDEX IF NOT EXISTS idx_rooms_due ON rooms(question_ends_at)
+      WHERE state='QUESTION' AND closed_at IS NULL;
+    CREATE INDEX IF NOT EXISTS idx_rooms_host_disc ON rooms(host_disconnected_at)
+      WHERE closed_at IS NULL AND host_connected=false;
     """
-    with db_conn() as conn, conn.cursor() as cur:
+    with get_conn() as conn, conn.cursor() as cur:
         cur.execute(ddl)
-        conn.commit()
 
 # ---------------------------
 # Rate limiting
 # ---------------------------
 
 def is_rate_limited(key: str, limit: int, window: int) -> bool:
-    now = time.time()
-    bucket = rate_limits.setdefault(key, [])
-    bucket[:] = [t for t in bucket if now - t < window]
-    if len(bucket) >= limit:
+    """
+    Token bucket: holds up to `limit` tokens, refilled at limit/window per second.
+    Each call spends one token; O(1) and no per-call allocation.
+    """
+    now = time.monotonic()
+    try:
+        bucket = rate_limits[key]
+    except KeyError:
+        rate_limits[key] = [limit - 1.0, now]
+        return False
+
+    tokens = min(float(limit), bucket[0] + (now - bucket[1]) * (limit / window))
+    bucket[1] = now
+    if tokens < 1.0:
+        bucket[0] = tokens
         return True
-    bucket.append(now)
+    bucket[0] = tokens - 1.0
     return False
 
+def sweep_rate_limits() -> None:
+    # drop buckets idle long enough to be full again (e.g. disconnected sids)
+    cutoff = time.monotonic() - RATE_LIMIT_IDLE_SECONDS
+    for key in [k for k, b in rate_limits.items() if b[1] < cutoff]:
+        del rate_limits[key]
+
 # ---------------------------
 # Helpers
 # ---------------------------
 
+# tokens are issued by this server as str(uuid4()): lowercase, hyphenated
+_UUID_FULLMATCH = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}").fullmatch
+
+def is_valid_token(token: Any) -> bool:
+    return isinstance(token, str) and _UUID_FULLMATCH(token) is not None
+
+def is_valid_pin(pin: Any) -> bool:
+    pin = str(pin)
+    return len(pin) == 6 and pin.isascii() and pin.isdigit()
+
 def generate_pin() -> str:
     return "".join(random.choices(string.digits, k=6))
 
@@ -210,25 +404,103 @@ def require_room_state(room: Dict[str, Any], allowed_states: list[str]) -> bool:
     return (room.get("state") or "").upper() in [s.upper() for s in allowed_states]
 
 def leaderboard_for_room_id(room_id: int) -> list[Dict[str, Any]]:
-    rows = db_all(
-        "SELECT name, score, connected FROM players WHERE room_id=%s ORDER BY score DESC, created_at ASC",
+    # built by Postgres as one json value (psycopg2 decodes it to a list of dicts)
+    row = db_one(
+        """
+        SELECT COALESCE(
+                 json_agg(
+                   json_build_object('name', name, 'score', score, 'connected', connected)
+                   ORDER BY score DESC, created_at ASC
+                 ),
+                 '[]'::json
+               ) AS board
+        FROM players
+        WHERE room_id=$1
+        """,
         (room_id,),
+        prepared="leaderboard",
     )
-    return [{"name": r["name"], "score": int(r["score"]), "connected": bool(r["connected"])} for r in rows]
+    return row["board"] if row else []
+
+def leaderboard_for_pin(pin: str) -> list[Dict[str, Any]]:
+    # by pin regardless of closed_at (pins are unique), so finished games resolve too
+    row = db_one(
+        """
+        SELECT COALESCE(
+                 json_agg(
+                   json_build_object('name', name, 'score', score, 'connected', connected)
+                   ORDER BY score DESC, created_at ASC
+                 ),
+                 '[]'::json
+               ) AS board
+        FROM players
+        WHERE room_id=(SELECT id FROM rooms WHERE pin=$1)
+        """,
+        (pin,),
+        prepared="leaderboard_by_pin",
+    )
+    return row["board"] if row else []
 
 def get_room_by_pin(pin: str) -> Optional[Dict[str, Any]]:
-    return db_one("SELECT * FROM rooms WHERE pin=%s AND closed_at IS NULL", (pin,))
+    cached = _room_cache.get(pin)
+    now = time.monotonic()
+    if cached and now - cached[0] < ROOM_CACHE_TTL_SECONDS:
+        return cached[1]
+
+    room = db_one("SELECT * FROM rooms WHERE pin=$1 AND closed_at IS NULL", (pin,), prepared="get_room")
+    if room:
+        # epoch float, converted once per fetch instead of on every comparison
+        room["_ends_at_ts"] = room["question_ends_at"].timestamp() if room["question_ends_at"] else None
+        _room_cache[pin] = (now, room)
+    else:
+        _room_cache.pop(pin, None)
+    return room
+
+def invalidate_room(pin: str) -> None:
+    # call after any UPDATE that changes a room's state/host/question fields
+    _room_cache.pop(pin, None)
 
 def touch_room_activity(room_id: int) -> None:
-    db_exec("UPDATE rooms SET last_activity_at=now() WHERE id=%s", (room_id,))
+    # last_activity_at only feeds cleanup deadlines, so it is written by activity_flush_task
+    _dirty_activity.add(int(room_id))
 
-def close_room(pin: str, reason: str = "host_timeout") -> None:
-    room = get_room_by_pin(pin)
-    if not room:
+def flush_room_activity() -> None:
+    if not _dirty_activity:
         return
+    room_ids = list(_dirty_activity)
+    _dirty_activity.clear()
+    try:
+        db_exec("UPDATE rooms SET last_activity_at=now() WHERE id = ANY($1)", (room_ids,), prepared="touch_rooms")
+    except Exception:
+        # keep them for the next flush
+        _dirty_activity.update(room_ids)
+        raise
 
-    db_exec("UPDATE rooms SET closed_at=now(), state='FINISHED', last_activity_at=now() WHERE id=%s", (room["id"],))
-    socketio.emit("room_closed", {"reason": reason}, room=pin)
+def broadcast(event: str, data: Dict[str, Any], pin: str) -> None:
+    """
+    Emit `event` to socket room `pin` on every worker.
+    Local sockets get it directly; with RELAY_BROADCASTS other workers get it via NOTIFY
+    and their quiz_events_listener_task.
+    A leaderboard that would push the payload over the NOTIFY size limit is left out
+    and re-read from the DB by the receiving workers.
+    """
+    socketio.emit(event, data, room=pin)
+    if not RELAY_BROADCASTS:
+        return
+
+    msg: Dict[str, Any] = {"origin": WORKER_ID, "event": event, "room": pin, "data": data}
+    payload = json.dumps(msg, ensure_ascii=False, separators=(",", ":"))
+    if len(payload.encode("utf-8")) > NOTIFY_PAYLOAD_MAX_BYTES and "leaderboard" in data:
+        msg["data"] = {k: v for k, v in data.items() if k != "leaderboard"}
+        msg["leaderboard_from_db"] = True
+        payload = json.dumps(msg, ensure_ascii=False, separators=(",", ":"))
+    if len(payload.encode("utf-8")) > NOTIFY_PAYLOAD_MAX_BYTES:
+        app.logger.warning("Not relaying %s for room %s: payload exceeds NOTIFY limit", event, pin)
+        return
+    try:
+        db_exec("SELECT pg_notify(%s, %s)", (QUIZ_EVENTS_CHANNEL, payload))
+    except Exception:
+        app.logger.exception("Failed to relay %s for room %s to other workers", event, pin)
 
 # ---------------------------
 # HTTP
@@ -254,9 +526,9 @@ def on_disconnect():
     if not meta:
         return
 
-    pin = meta.get("pin")
-    role = meta.get("role")
-    token = meta.get("token")
+    pin = meta.pin
+    role = meta.role
+    token = meta.token
 
     room = get_room_by_pin(pin) if pin else None
     if not room:
@@ -267,14 +539,12 @@ def on_disconnect():
             "UPDATE rooms SET host_connected=false, host_disconnected_at=now(), last_activity_at=now() WHERE id=%s",
             (room["id"],),
         )
+        invalidate_room(pin)
     elif role == "player" and token:
-        try:
-            player_token = uuid.UUID(token)
-        except Exception:
-            return
+        # token was validated when it was put into socket_index
         db_exec(
             "UPDATE players SET connected=false, last_seen_at=now() WHERE room_id=%s AND player_token=%s",
-            (room["id"], str(player_token)),
+            (room["id"], token),
         )
 
 # ---------------------------
@@ -300,7 +570,7 @@ def create_room():
     )
 
     join_room(pin)
-    socket_index[request.sid] = {"pin": pin, "role": "host", "token": str(host_token)}
+    socket_index[request.sid] = SocketMeta(pin, "host", str(host_token))
 
     emit(
         "room_created",
@@ -325,7 +595,7 @@ def join_game(data):
     name = (data or {}).get("name") or ""
 
     name = name.strip()
-    if not pin or len(str(pin)) != 6:
+    if not pin or not is_valid_pin(pin):
         emit("join_error", {"message": "Invalid PIN"})
         return
 
@@ -343,36 +613,62 @@ def join_game(data):
         emit("join_error", {"message": "Game finished"})
         return
 
-    # max players
-    count_row = db_one("SELECT COUNT(*) AS c FROM players WHERE room_id=%s", (room["id"],))
-    if count_row and int(count_row["c"]) >= MAX_PLAYERS_PER_ROOM:
-        emit("join_error", {"message": "Room is full"})
-        return
-
     player_token = uuid.uuid4()
 
-    db_exec(
-        """
-        INSERT INTO players(room_id, player_token, name, score, connected)
-        VALUES (%s, %s, %s, 0, true)
-        """,
-        (room["id"], str(player_token), name),
-    )
+    # max players: one transaction, one round trip.
+    # Locking the room row serializes joins per room; the INSERT is a separate statement,
+    # so under READ COMMITTED its count sees every join committed before the lock was granted.
+    # no row returned = room is full
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT 1 FROM rooms WHERE id=%(room_id)s FOR UPDATE;
+            INSERT INTO players(room_id, player_token, name, score, connected)
+            SELECT %(room_id)s, %(token)s, %(name)s, 0, true
+            WHERE (SELECT count(*) FROM players WHERE room_id=%(room_id)s) < %(max_players)s
+            RETURNING id
+            """,
+            {"room_id": room["id"], "token": str(player_token), "name": name, "max_players": MAX_PLAYERS_PER_ROOM},
+        )
+        inserted = cur.fetchone()
+    if not inserted:
+        emit("join_error", {"message": "Room is full"})
+        return
 
     touch_room_activity(room["id"])
 
     join_room(str(pin))
-    socket_index[request.sid] = {"pin": str(pin), "role": "player", "token": str(player_token)}
+    socket_index[request.sid] = SocketMeta(str(pin), "player", str(player_token))
 
     emit("joined", {"player_token": str(player_token)})
 
     # notify host (if host is currently connected, it will see it via socket room)
-    socketio.emit("player_joined", {"name": name}, room=str(pin))
+    broadcast("player_joined", {"name": name}, str(pin))
 
 # ---------------------------
 # Player: reconnect
 # ---------------------------
 
+def hydrate_room_payload(payload: Dict[str, Any], room: Dict[str, Any], leaderboard: list[Dict[str, Any]]) -> Dict[str, Any]:
+    state = (room["state"] or "").upper()
+    q_index = int(room["current_question_index"])
+    if not (0 <= q_index < len(QUESTIONS)):
+        return payload
+    q = QUESTIONS[q_index]
+
+    # hydrate QUESTION
+    if state == "QUESTION" and room.get("question_ends_at"):
+        payload["question"] = {**q["_public"], "ends_at": room["question_ends_at"].timestamp()}
+
+    # hydrate RESULTS
+    if state == "RESULTS":
+        payload["results"] = {
+            "correct_index": q["correct_index"],
+            "leaderboard": leaderboard,
+        }
+
+    return payload
+
 @socketio.on("reconnect_player")
 def reconnect_player(data):
     pin = (data or {}).get("pin")
@@ -382,62 +678,64 @@ def reconnect_player(data):
         emit("reconnect_error", {"message": "Missing data"})
         return
 
-    room = get_room_by_pin(str(pin))
-    if not room:
-        emit("reconnect_error", {"message": "Room not found"})
-        return
-
-    try:
-        player_token = uuid.UUID(player_token_s)
-    except Exception:
+    if not is_valid_token(player_token_s):
         emit("reconnect_error", {"message": "Invalid token"})
         return
+    player_token = player_token_s
 
-    player = db_one(
-        "SELECT * FROM players WHERE room_id=%s AND player_token=%s",
-        (room["id"], str(player_token)),
+    # room + mark player connected + leaderboard in one round trip.
+    # lb sees the pre-update snapshot, hence the "OR player_token" for this player's own flag.
+    # no row = room not found; player_score NULL = player not found
+    rows = db_exec_returning(
+        """
+        WITH r AS (
+          SELECT * FROM rooms WHERE pin=%(pin)s AND closed_at IS NULL
+        ),
+        upd AS (
+          UPDATE players
+          SET connected=true, last_seen_at=now()
+          WHERE room_id=(SELECT id FROM r) AND player_token=%(token)s
+          RETURNING score
+        ),
+        lb AS (
+          SELECT COALESCE(
+                   json_agg(
+                     json_build_object('name', name, 'score', score, 'connected', connected OR player_token=%(token)s)
+                     ORDER BY score DESC, created_at ASC
+                   ),
+                   '[]'::json
+                 ) AS board
+          FROM players
+          WHERE room_id=(SELECT id FROM r)
+        )
+        SELECT r.*, upd.score AS player_score, lb.board
+        FROM r
+        LEFT JOIN upd ON true
+        CROSS JOIN lb
+        """,
+        {"pin": str(pin), "token": player_token},
     )
-    if not player:
+    room = rows[0] if rows else None
+    if not room:
+        emit("reconnect_error", {"message": "Room not found"})
+        return
+
+    if room["player_score"] is None:
         emit("reconnect_error", {"message": "Player not found"})
         return
 
-    db_exec(
-        "UPDATE players SET connected=true, last_seen_at=now() WHERE id=%s",
-        (player["id"],),
-    )
     touch_room_activity(room["id"])
 
     join_room(str(pin))
-    socket_index[request.sid] = {"pin": str(pin), "role": "player", "token": str(player_token)}
+    socket_index[request.sid] = SocketMeta(str(pin), "player", player_token)
 
     payload: Dict[str, Any] = {
         "state": room["state"],
-        "score": int(player["score"]),
+        "score": int(room["player_score"]),
         "current_question_index": int(room["current_question_index"]),
     }
 
-    # hydrate QUESTION
-    if (room["state"] or "").upper() == "QUESTION" and room.get("question_ends_at"):
-        q_index = int(room["current_question_index"])
-        if 0 <= q_index < len(QUESTIONS):
-            q = QUESTIONS[q_index]
-            payload["question"] = {
-                "text": q["text"],
-                "options": q["options"],
-                "ends_at": room["question_ends_at"].timestamp(),
-            }
-
-    # hydrate RESULTS
-    if (room["state"] or "").upper() == "RESULTS":
-        q_index = int(room["current_question_index"])
-        if 0 <= q_index < len(QUESTIONS):
-            q = QUESTIONS[q_index]
-            payload["results"] = {
-                "correct_index": q["correct_index"],
-                "leaderboard": leaderboard_for_room_id(room["id"]),
-            }
-
-    emit("reconnected", payload)
+    emit("reconnected", hydrate_room_payload(payload, room, room["board"]))
 
 # ---------------------------
 # Host: reconnect
@@ -452,55 +750,62 @@ def reconnect_host(data):
         emit("reconnect_error", {"message": "Missing data"})
         return
 
-    room = get_room_by_pin(str(pin))
-    if not room:
-        emit("reconnect_error", {"message": "Room not found"})
+    if not is_valid_token(host_token_s):
+        emit("reconnect_error", {"message": "Invalid host token"})
         return
+    host_token = host_token_s
 
-    try:
-        host_token = uuid.UUID(host_token_s)
-    except Exception:
-        emit("reconnect_error", {"message": "Invalid host token"})
+    # room + mark host connected (only if the token matches) + leaderboard in one round trip.
+    # no row = room not found; host_ok false = wrong token
+    rows = db_exec_returning(
+        """
+        WITH r AS (
+          SELECT * FROM rooms WHERE pin=%(pin)s AND closed_at IS NULL
+        ),
+        upd AS (
+          UPDATE rooms
+          SET host_connected=true, host_disconnected_at=NULL, last_activity_at=now()
+          WHERE id=(SELECT id FROM r) AND host_token=%(token)s
+          RETURNING id
+        ),
+        lb AS (
+          SELECT COALESCE(
+                   json_agg(
+                     json_build_object('name', name, 'score', score, 'connected', connected)
+                     ORDER BY score DESC, created_at ASC
+                   ),
+                   '[]'::json
+                 ) AS board
+          FROM players
+          WHERE room_id=(SELECT id FROM r)
+        )
+        SELECT r.*, upd.id IS NOT NULL AS host_ok, lb.board
+        FROM r
+        LEFT JOIN upd ON true
+        CROSS JOIN lb
+        """,
+        {"pin": str(pin), "token": host_token},
+    )
+    room = rows[0] if rows else None
+    if not room:
+        emit("reconnect_error", {"message": "Room not found"})
         return
 
-    if str(room["host_token"]) != str(host_token):
+    if not room["host_ok"]:
         emit("reconnect_error", {"message": "Invalid host token"})
         return
-
-    db_exec(
-        "UPDATE rooms SET host_connected=true, host_disconnected_at=NULL, last_activity_at=now() WHERE id=%s",
-        (room["id"],),
-    )
+    invalidate_room(str(pin))
 
     join_room(str(pin))
-    socket_index[request.sid] = {"pin": str(pin), "role": "host", "token": str(host_token)}
+    socket_index[request.sid] = SocketMeta(str(pin), "host", host_token)
 
     payload: Dict[str, Any] = {
         "state": room["state"],
         "current_question_index": int(room["current_question_index"]),
-        "players": leaderboard_for_room_id(room["id"]),
+        "players": room["board"],
     }
 
-    if (room["state"] or "").upper() == "QUESTION" and room.get("question_ends_at"):
-        q_index = int(room["current_question_index"])
-        if 0 <= q_index < len(QUESTIONS):
-            q = QUESTIONS[q_index]
-            payload["question"] = {
-                "text": q["text"],
-                "options": q["options"],
-                "ends_at": room["question_ends_at"].timestamp(),
-            }
-
-    if (room["state"] or "").upper() == "RESULTS":
-        q_index = int(room["current_question_index"])
-        if 0 <= q_index < len(QUESTIONS):
-            q = QUESTIONS[q_index]
-            payload["results"] = {
-                "correct_index": q["correct_index"],
-                "leaderboard": leaderboard_for_room_id(room["id"]),
-            }
-
-    emit("host_reconnected", payload)
+    emit("host_reconnected", hydrate_room_payload(payload, room, room["board"]))
 
 # ---------------------------
 # Host actions (state-guarded + token-verified)
@@ -524,7 +829,7 @@ def verify_host_and_get_room(data) -> Optional[Dict[str, Any]]:
 
     # also make sure caller is the current host socket (prevents token reuse from another socket without reconnect)
     meta = socket_index.get(request.sid)
-    if not meta or meta.get("role") != "host" or meta.get("pin") != str(pin):
+    if not meta or meta.role != "host" or meta.pin != str(pin):
         emit("error", {"message": "Host socket not registered. Reconnect host."})
         return None
 
@@ -545,6 +850,7 @@ def start_game(data):
         "UPDATE rooms SET current_question_index=0, last_activity_at=now() WHERE id=%s",
         (room["id"],),
     )
+    invalidate_room(str(room["pin"]))
     start_question(pin=str(room["pin"]))
 
 @socketio.on("next_question")
@@ -564,10 +870,11 @@ def next_question(data):
             "UPDATE rooms SET state='FINISHED', closed_at=now(), last_activity_at=now() WHERE id=%s",
             (room["id"],),
         )
-        socketio.emit(
+        invalidate_room(str(room["pin"]))
+        broadcast(
             "game_finished",
             {"leaderboard": leaderboard_for_room_id(room["id"])},
-            room=str(room["pin"]),
+            str(room["pin"]),
         )
         return
 
@@ -575,6 +882,7 @@ def next_question(data):
         "UPDATE rooms SET current_question_index=%s, last_activity_at=now() WHERE id=%s",
         (next_index, room["id"]),
     )
+    invalidate_room(str(room["pin"]))
 
     start_question(pin=str(room["pin"]))
 
@@ -605,13 +913,10 @@ def submit_answer(data):
 
     # validate player identity to this socket
     meta = socket_index.get(request.sid)
-    if not meta or meta.get("role") != "player" or meta.get("pin") != str(pin) or meta.get("token") != str(player_token_s):
-        return
-
-    try:
-        player_token = uuid.UUID(str(player_token_s))
-    except Exception:
+    # (the token equals one this server issued, so no separate format check is needed)
+    if not meta or meta.role != "player" or meta.pin != str(pin) or meta.token != str(player_token_s):
         return
+    player_token = meta.token
 
     # validate option
     try:
@@ -627,20 +932,21 @@ def submit_answer(data):
         return
 
     # reject after time ends
-    if not room.get("question_ends_at"):
+    if room["_ends_at_ts"] is None:
         return
 
-    if utc_now() > room["question_ends_at"]:
+    if time.time() > room["_ends_at_ts"]:
         return
 
     # store answer once (ON CONFLICT DO NOTHING)
     db_exec(
         """
         INSERT INTO answers(room_id, player_token, question_index, option_index)
-        VALUES (%s, %s, %s, %s)
+        VALUES ($1, $2, $3, $4)
         ON CONFLICT (room_id, player_token, question_index) DO NOTHING
         """,
-        (room["id"], str(player_token), q_index, option_index),
+        (room["id"], player_token, q_index, option_index),
+        prepared="insert_answer",
     )
     touch_room_activity(room["id"])
 
@@ -660,7 +966,7 @@ def start_question(pin: str):
     question = QUESTIONS[q_index]
     duration = int(question["duration"])
 
-    db_exec(
+    rows = db_exec_returning(
         """
         UPDATE rooms
         SET state='QUESTION',
@@ -668,143 +974,240 @@ def start_question(pin: str):
             question_ends_at=now() + (%s || ' seconds')::interval,
             last_activity_at=now()
         WHERE id=%s
+        RETURNING question_ends_at
         """,
         (duration, room["id"]),
     )
-
-    # hydrate updated room
-    room2 = get_room_by_pin(pin)
-    if not room2 or not room2.get("question_ends_at"):
+    invalidate_room(pin)
+    if not rows:
         return
 
-    socketio.emit(
+    ends_at_ts = rows[0]["question_ends_at"].timestamp()
+
+    broadcast(
         "question_started",
-        {
-            "index": q_index,
-            "text": question["text"],
-            "options": question["options"],
-            "ends_at": room2["question_ends_at"].timestamp(),
-        },
-        room=pin,
+        {"index": q_index, **question["_public"], "ends_at": ends_at_ts},
+        pin,
     )
 
-def finish_question_if_due(pin: str):
+    schedule_question_deadline(pin, ends_at_ts)
+
+def schedule_question_deadline(pin: str, ends_at_ts: float) -> None:
+    heapq.heappush(_due_heap, (ends_at_ts + QUESTION_FINALIZE_GRACE_SECONDS, pin))
+    _due_wakeup.set()
+
+FINALIZE_QUESTIONS_SQL = """
+WITH locked AS (
+  UPDATE rooms
+  SET state='RESULTS', last_activity_at=now()
+  WHERE id IN (
+    SELECT id
+    FROM rooms
+    WHERE closed_at IS NULL
+      AND state='QUESTION'
+      AND question_ends_at IS NOT NULL
+      AND question_ends_at <= %(now)s
+    FOR UPDATE SKIP LOCKED
+  )
+  RETURNING id, pin, current_question_index, question_ends_at
+),
+scored AS (
+  SELECT a.room_id, a.player_token,
+         1000 + GREATEST(0, floor(
+           EXTRACT(EPOCH FROM (l.question_ends_at - a.answered_at))
+           * (%(bonus_scales)s::float8[])[l.current_question_index + 1]
+         ))::int AS pts
+  FROM locked l
+  JOIN answers a ON a.room_id = l.id AND a.question_index = l.current_question_index
+  WHERE a.option_index = (%(correct)s::int[])[l.current_question_index + 1]
+),
+upd AS (
+  UPDATE players p
+  SET score = p.score + s.pts, last_seen_at=now()
+  FROM scored s
+  WHERE p.room_id = s.room_id AND p.player_token = s.player_token
+  RETURNING p.id, p.score
+)
+SELECT l.pin,
+       l.current_question_index,
+       COALESCE(
+         json_agg(
+           json_build_object('name', p.name, 'score', COALESCE(u.score, p.score), 'connected', p.connected)
+           ORDER BY COALESCE(u.score, p.score) DESC, p.created_at ASC
+         ) FILTER (WHERE p.id IS NOT NULL),
+         '[]'::json
+       ) AS board
+FROM locked l
+LEFT JOIN players p ON p.room_id = l.id
+LEFT JOIN upd u ON u.id = p.id
+GROUP BY l.id, l.pin, l.current_question_index
+"""
+
+def finalize_due_questions() -> set[str]:
     """
-    Finalize QUESTION -> RESULTS if:
-    - state is QUESTION
-    - ends_at passed
-    Uses atomic UPDATE ... WHERE state='QUESTION' to prevent double-finalize.
+    Finalize QUESTION -> RESULTS for every overdue room, in one statement:
+    lock the rooms, score correct answers (1000 base + up to 500 bonus for time left),
+    update scores and read the leaderboards.
+    - FOR UPDATE SKIP LOCKED + state='QUESTION' prevent double-finalize, also across workers
+    - leaderboards read new scores from upd's RETURNING: every CTE shares one snapshot
+    - one row per locked room, leaderboard built as json (empty list for a room without players)
+    Returns the pins it finalized; rooms whose row was locked by another write are skipped.
     """
-    room = get_room_by_pin(pin)
-    if not room:
-        return
+    with get_conn() as conn, conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        cur.execute(
+            FINALIZE_QUESTIONS_SQL,
+            {
+                # only rooms whose grace period has passed too
+                "now": utc_now() - timedelta(seconds=QUESTION_FINALIZE_GRACE_SECONDS),
+                "bonus_scales": QUESTION_BONUS_SCALES,
+                "correct": QUESTION_CORRECT_INDEXES,
+            },
+        )
+        rows = cur.fetchall()
 
-    if not require_room_state(room, ["QUESTION"]):
-        return
+    finalized: set[str] = set()
+    for r in rows:
+        pin = str(r["pin"])
+        q_index = int(r["current_question_index"])
+        finalized.add(pin)
+        invalidate_room(pin)
+        if not (0 <= q_index < len(QUESTIONS)):
+            continue
 
-    if not room.get("question_ends_at"):
-        return
+        # emit results
+        broadcast(
+            "question_results",
+            {
+                "correct_index": int(QUESTIONS[q_index]["correct_index"]),
+                "leaderboard": r["board"],
+            },
+            pin,
+        )
 
-    if utc_now() <= room["question_ends_at"]:
-        return
+    return finalized
 
-    # acquire finalize lock
-    locked = db_one(
-        """
-        UPDATE rooms
-        SET state='RESULTS', last_activity_at=now()
-        WHERE id=%s AND state='QUESTION'
-        RETURNING id, pin, current_question_index, question_started_at, question_ends_at
-        """,
-        (room["id"],),
-    )
-    if not locked:
-        return
-
-    room_id = int(locked["id"])
-    q_index = int(locked["current_question_index"])
-    if not (0 <= q_index < len(QUESTIONS)):
-        return
+# ---------------------------
+# Background tasks
+# ---------------------------
 
-    question = QUESTIONS[q_index]
-    correct = int(question["correct_index"])
-    duration = int(question["duration"])
+def watchdog_task():
+    """
+    Sleeps until the earliest question deadline, then finalizes all overdue rooms
+    (one statement for all of them).
+    - start_question pushes deadlines and wakes it up, so nothing runs while no question is active
+    - on boot the heap is reseeded from rooms in QUESTION (survives restarts / Render sleep)
+    - a slow fallback sweep catches rooms it was never told about
+    - popped rooms that were not finalized (row locked by another write, DB error) are
+      re-checked after WATCHDOG_RETRY_SECONDS while they are still in QUESTION
+    Deadlines are compared on the app clock, the same one submit_answer uses.
+    """
+    seeded = False
+    while True:
+        if not seeded:
+            try:
+                reseed_due_heap()
+                seeded = True
+            except Exception:
+                app.logger.exception("Failed to reseed question deadlines")
+
+        timeout = float(WATCHDOG_FALLBACK_SECONDS if seeded else WATCHDOG_RETRY_SECONDS)
+        if _due_heap:
+            timeout = min(timeout, max(0.0, _due_heap[0][0] - time.time()))
+
+        # woken early = a new deadline was pushed; timed out = a deadline or the fallback is due
+        woken = _due_wakeup.wait(timeout)
+        _due_wakeup.clear()
+
+        due = not woken
+        popped: set[str] = set()
+        now = time.time()
+        while _due_heap and _due_heap[0][0] <= now:
+            popped.add(heapq.heappop(_due_heap)[1])
+            due = True
+
+        if not due:
+            continue
 
-    # fetch answers for this question
-    answers = db_all(
+        try:
+            finalized = finalize_due_questions()
+        except Exception:
+            app.logger.exception("Failed to finalize due questions")
+            finalized = set()
+
+        # stale entries (room already finished/closed) are dropped; the rest is retried shortly
+        for pin in popped - finalized:
+            try:
+                still_open = require_room_state(get_room_by_pin(pin) or {}, ["QUESTION"])
+            except Exception:
+                app.logger.exception("Failed to re-check room %s", pin)
+                still_open = True  # can't tell, so retry
+            if still_open:
+                heapq.heappush(_due_heap, (time.time() + WATCHDOG_RETRY_SECONDS, pin))
+
+def reseed_due_heap() -> None:
+    rows = db_all(
+        """
+        SELECT pin, question_ends_at
+        FROM rooms
+        WHERE closed_at IS NULL
+          AND state='QUESTION'
+          AND question_ends_at IS NOT NULL
         """
-        SELECT player_token, option_index, answered_at
-        FROM answers
-        WHERE room_id=%s AND question_index=%s
-        """,
-        (room_id, q_index),
     )
+    for r in rows:
+        schedule_question_deadline(str(r["pin"]), r["question_ends_at"].timestamp())
 
-    # compute points
-    base_points = 1000
-    ends_at: datetime = locked["question_ends_at"]
+def activity_flush_task():
+    """
+    Write debounced room activity once per interval (one UPDATE for all touched rooms).
+    """
+    while True:
+        socketio.sleep(ACTIVITY_FLUSH_INTERVAL_SECONDS)
 
-    # group by player (already unique by constraint)
-    for a in answers:
         try:
-            opt = int(a["option_index"])
+            flush_room_activity()
         except Exception:
-            continue
-        if opt != correct:
-            continue
-
-        answered_at: datetime = a["answered_at"]
-        # time_left in seconds
-        time_left = (ends_at - answered_at).total_seconds()
-        if time_left < 0:
-            time_left = 0.0
-
-        bonus = int((time_left / max(1, duration)) * 500)
-        if bonus < 0:
-            bonus = 0
-
-        points = base_points + bonus
-
-        db_exec(
-            "UPDATE players SET score = score + %s, last_seen_at=now() WHERE room_id=%s AND player_token=%s",
-            (points, room_id, str(a["player_token"])),
-        )
-
-    # emit results
-    socketio.emit(
-        "question_results",
-        {
-            "correct_index": correct,
-            "leaderboard": leaderboard_for_room_id(room_id),
-        },
-        room=str(pin),
-    )
+            app.logger.exception("Failed to flush room activity")
 
-# ---------------------------
-# Background tasks
-# ---------------------------
-
-def watchdog_task():
+def quiz_events_listener_task():
     """
-    Every few seconds:
-    - finalize any rooms stuck in QUESTION past ends_at
-    This makes the system survive restarts / Render sleep.
+    Fan-out between workers without Redis:
+    LISTEN on a dedicated connection and emit other workers' broadcast()s to this worker's sockets
+    (own messages are skipped: broadcast() already emitted them locally).
+    Also drops the room from the local cache, since another worker may have changed it.
+    Reconnects after a backoff if the connection drops.
     """
     while True:
-        socketio.sleep(WATCHDOG_INTERVAL_SECONDS)
+        conn = None
+        try:
+            conn = psycopg2.connect(_db_url(), sslmode="require")
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {QUIZ_EVENTS_CHANNEL}")
+
+            while True:
+                # park this greenlet until the server sends something
+                trampoline(conn.fileno(), read=True)
+                conn.poll()
+                while conn.notifies:
+                    msg = json.loads(conn.notifies.pop(0).payload)
+                    if msg["origin"] == WORKER_ID:
+                        continue
+                    invalidate_room(msg["room"])
+                    try:
+                        if msg.get("leaderboard_from_db"):
+                            msg["data"]["leaderboard"] = leaderboard_for_pin(msg["room"])
+                    except Exception:
+                        app.logger.exception("Failed to load leaderboard for relayed %s", msg["event"])
+                        continue
+                    socketio.emit(msg["event"], msg["data"], room=msg["room"])
+        except Exception:
+            app.logger.exception("quiz_events listener failed; reconnecting")
+        finally:
+            if conn is not None:
+                conn.close()
 
-        rooms_due = db_all(
-            """
-            SELECT pin
-            FROM rooms
-            WHERE closed_at IS NULL
-              AND state='QUESTION'
-              AND question_ends_at IS NOT NULL
-              AND question_ends_at < now()
-            """
-        )
-        for r in rooms_due:
-            finish_question_if_due(str(r["pin"]))
+        socketio.sleep(LISTENER_RECONNECT_SECONDS)
 
 def cleanup_task():
     """
@@ -813,20 +1216,25 @@ def cleanup_task():
     while True:
         socketio.sleep(CLEANUP_INTERVAL_SECONDS)
 
-        # find rooms whose host is disconnected for longer than TTL
-        rows = db_all(
+        sweep_rate_limits()
+
+        # close rooms whose host is disconnected for longer than TTL (one statement for all of them)
+        rows = db_exec_returning(
             """
-            SELECT pin
-            FROM rooms
+            UPDATE rooms
+            SET closed_at=now(), state='FINISHED', last_activity_at=now()
             WHERE closed_at IS NULL
               AND host_connected=false
               AND host_disconnected_at IS NOT NULL
               AND host_disconnected_at < now() - (%s || ' seconds')::interval
+            RETURNING pin
             """,
             (ROOM_TTL_SECONDS,),
         )
         for r in rows:
-            close_room(str(r["pin"]), reason="host_timeout")
+            pin = str(r["pin"])
+            invalidate_room(pin)
+            broadcast("room_closed", {"reason": "host_timeout"}, pin)
 
 
 @app.route("/host")
@@ -844,8 +1252,11 @@ def player_page():
 ensure_tables()
 
 if __name__ == "__main__":
+    if RELAY_BROADCASTS:
+        socketio.start_background_task(quiz_events_listener_task)
     socketio.start_background_task(watchdog_task)
     socketio.start_background_task(cleanup_task)
+    socketio.start_background_task(activity_flush_task)
 
     socketio.run(
         app,